@@ -17,8 +17,14 @@ class Aggregate(object):
             self.field, self.properties = self.argument.split('.', 1)
 
     def execute(self, elements):
+        self.start()
+        for element in elements:
+            self.update(element)
+        return self.finalize()
+
+    def update(self, element):
         try:
-            return self._execute(elements)
+            self._update(element)
         except KeyError:
             raise LIBREFieldError('Unknown field: %s' % self.argument)
         except AttributeError as exception:
@@ -26,58 +32,94 @@ class Aggregate(object):
         except TypeError as exception:
             raise LIBREFieldError('Field aggregation error; %s' % exception)
 
+    def get_value(self, element):
+        if self.properties:
+            return return_attrib(itemgetter(self.field)(element), self.properties)
+        else:
+            return element[self.argument]
+
 
 class Count(Aggregate):
-    def _execute(self, elements):
+    def start(self):
+        self.count = 0
+        self.values = set()
+
+    def _update(self, element):
         if self.argument == '*':
-            return len(list(elements))
+            self.count += 1
         else:
-            if self.properties:
-                return len(set([return_attrib(itemgetter(self.field)(element), self.properties) for element in elements]))
-            else:
-                return len(set([element[self.argument] for element in elements if element[self.argument]]))
+            value = self.get_value(element)
+            if self.properties or value:
+                self.values.add(value)
+
+    def finalize(self):
+        if self.argument == '*':
+            return self.count
+        else:
+            return len(self.values)
 
 
 class Sum(Aggregate):
-    def _execute(self, elements):
-        if self.properties:
-            return sum([return_attrib(itemgetter(self.field)(element), self.properties) for element in elements])
-        else:
-            return sum([element[self.argument] for element in elements if element[self.argument]])
+    def start(self):
+        self.total = 0
+
+    def _update(self, element):
+        value = self.get_value(element)
+        if self.properties or value:
+            self.total += value
+
+    def finalize(self):
+        return self.total
 
 
 class Max(Aggregate):
-    def _execute(self, elements):
-        if self.properties:
-            return max([return_attrib(itemgetter(self.field)(element), self.properties) for element in elements])
-        else:
-            return max([element[self.argument] for element in elements if element[self.argument]])
+    def start(self):
+        # None can be an actual value, track having seen one separately
+        self.empty = True
+        self.result = None
+
+    def _update(self, element):
+        value = self.get_value(element)
+        if self.properties or value:
+            if self.empty or value > self.result:
+                self.empty = False
+                self.result = value
+
+    def finalize(self):
+        return self.result
 
 
 class Min(Aggregate):
-    def _execute(self, elements):
-        if self.properties:
-            return min([return_attrib(itemgetter(self.field)(element), self.properties) for element in elements])
-        else:
-            return min([element[self.argument] for element in elements if element[self.argument]])
+    def start(self):
+        # None can be an actual value, track having seen one separately
+        self.empty = True
+        self.result = None
+
+    def _update(self, element):
+        value = self.get_value(element)
+        if self.properties or value:
+            if self.empty or value < self.result:
+                self.empty = False
+                self.result = value
+
+    def finalize(self):
+        return self.result
 
 
 class Average(Aggregate):
-    def _execute(self, elements):
-        total = float(0)
+    def start(self):
+        self.total = float(0)
+        self.count = 0
 
-        count = 0
-        if self.properties:
-            for count, element in enumerate(elements, 1):
-                total = total + return_attrib(itemgetter(self.field)(element), self.properties)
-        else:
-            for count, element in enumerate(elements, 1):
-                total = total + element[self.argument]
+    def _update(self, element):
+        self.total = self.total + self.get_value(element)
+        self.count += 1
 
-        if count == 0:
+    def finalize(self):
+        if self.count == 0:
             return float('nan')
         else:
-            return total / float(count)
+            return self.total / float(self.count)
 
 
 AGGREGATES_NAMES = {
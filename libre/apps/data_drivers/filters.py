@@ -1,5 +1,7 @@
 from __future__ import absolute_import
 
+import datetime
+
 from shapely.prepared import prep
 
 from .exceptions import LQLFilterError
@@ -25,6 +27,9 @@ FILTER_TOUCHES = 20
 FILTER_WITHIN = 21
 FILTER_IEQUALS = 22
 
+# Value types whose hash is consistent with their equality
+HASHABLE_SCALAR_TYPES = (basestring, bool, int, long, float, datetime.date, datetime.time)
+
 FILTER_NAMES = {
     'contains': FILTER_CONTAINS,
     'icontains': FILTER_ICONTAINS,
@@ -49,6 +54,9 @@ FILTER_NAMES = {
 
 
 class Filter():
+    # Spatial filters call into GEOS for every row, the most expensive to evaluate
+    spatial = False
+
     def __init__(self, field, filter_value, negation):
         self.field = field
         self.filter_value = filter_value
@@ -146,7 +154,23 @@ class GreaterThanOrEqual(Filter):
 
 # Other
 class In(Filter):
+    def __init__(self, field, filter_value, negation):
+        Filter.__init__(self, field, filter_value, negation)
+        # Hash the list of values once to avoid a linear scan of it for every row,
+        # only for plain scalars, other values (ie: geometries) may compare
+        # equal while hashing differently and keep using the list scan
+        self.filter_set = None
+        if isinstance(filter_value, (list, tuple)) and all(isinstance(element, HASHABLE_SCALAR_TYPES) for element in filter_value):
+            self.filter_set = frozenset(filter_value)
+
     def _evaluate(self, value):
+        if self.filter_set is not None:
+            try:
+                return value in self.filter_set
+            except TypeError:
+                # Unhashable row value, fallback to scanning the list
+                pass
+
         try:
             return value in self.filter_value
         except TypeError:
@@ -167,7 +191,24 @@ class Range(Filter):
 
 
 # Spatial filters
+class PreparedFilter(Filter):
+    """
+    Prepare the filter geometry once so that its spatial index is reused
+    when testing it against every row's geometry
+    """
+    spatial = True
+
+    def __init__(self, field, filter_value, negation):
+        Filter.__init__(self, field, filter_value, negation)
+        try:
+            self.prepared = prep(self.filter_value)
+        except (AttributeError, ValueError):
+            raise LQLFilterError('field: %s, filter value is not a geometry' % self.field)
+
+
 class Has(Filter):
+    spatial = True
+
     def _evaluate(self, value):
         try:
             return value.contains(self.filter_value)
@@ -175,23 +216,26 @@ class Has(Filter):
             raise LQLFilterError('field: %s, is not a geometry' % self.field)
 
 
-class Disjoint(Filter):
+class Disjoint(PreparedFilter):
     def _evaluate(self, value):
         try:
-            return value.disjoint(self.filter_value)
+            # Disjoint is the negation of intersects, which prepared geometries do support
+            return not self.prepared.intersects(value)
         except AttributeError:
             raise LQLFilterError('field: %s, is not a geometry' % self.field)
 
 
-class Intersects(Filter):
+class Intersects(PreparedFilter):
     def _evaluate(self, value):
         try:
-            return value.intersects(self.filter_value)
+            return self.prepared.intersects(value)
         except AttributeError:
             raise LQLFilterError('field: %s, is not a geometry' % self.field)
 
 
 class Touches(Filter):
+    spatial = True
+
     def _evaluate(self, value):
         try:
             return value.touches(self.filter_value)
@@ -199,17 +243,7 @@ class Touches(Filter):
             raise LQLFilterError('field: %s, is not a geometry' % self.field)
 
 
-class Within(Filter):
-    def __init__(self, field, filter_value, negation):
-        self.field = field
-        self.filter_value = filter_value
-        self.prepared = prep(self.filter_value)
-        self.negation = negation
-        if negation:
-            self.evaluate = lambda x: not(self._evaluate(x))
-        else:
-            self.evaluate = self._evaluate
-
+class Within(PreparedFilter):
     def _evaluate(self, value):
         try:
             return self.prepared.contains(value)
@@ -242,3 +276,6 @@ FILTER_CLASS_MAP = {
     FILTER_TOUCHES: Touches,
     FILTER_WITHIN: Within,
 }
+
+# Direct filter name to filter class map, resolved once at import time
+FILTER_BY_NAME = dict([(name, FILTER_CLASS_MAP[identifier]) for name, identifier in FILTER_NAMES.items()])
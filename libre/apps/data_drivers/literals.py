@@ -11,6 +11,9 @@ from .settings import LQL_DELIMITER
 # Row based
 DEFAULT_LIMIT = 50
 
+# Number of rows between adaptive reorderings of the query filters
+FILTER_REORDER_INTERVAL = 1000
+
 # Excel
 DEFAULT_SHEET = '0'
 
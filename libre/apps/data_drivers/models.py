@@ -1,7 +1,6 @@
 from __future__ import absolute_import
 
 import datetime
-from itertools import islice
 import logging
 import os
 import re
@@ -180,7 +179,7 @@ class Source(models.Model):
         return all(cell_skip is False for cell_skip in skip_result) and all(import_result)
 
     def get_all(self, id=None, parameters=None):
-        logger.debug('parameters: %s' % parameters)
+        logger.debug('parameters: %s', parameters)
         initial_datetime = datetime.datetime.now()
         timestamp, parameters = Source.analyze_request(parameters)
         logger.debug('timestamp: %s', timestamp)
@@ -193,13 +192,17 @@ class Source(models.Model):
         except SourceDataVersion.DoesNotExist:
             return []
 
-        self.base_iterator = (item.row for item in SourceData.objects.filter(source_data_version=source_data_version).iterator())
+        queryset = SourceData.objects.filter(source_data_version=source_data_version)
 
         if id:
-            self.base_iterator = islice(self.base_iterator, id - 1, id)
+            # Let the database find the row by its indexed row id instead
+            # of unpickling every row before it
+            queryset = queryset.filter(row_id=id)
+
+        self.base_queryset = queryset
 
         results = Query(self).execute(parameters)
-        logger.debug('query elapsed time: %s' % (datetime.datetime.now() - initial_datetime))
+        logger.debug('query elapsed time: %s', datetime.datetime.now() - initial_datetime)
 
         return results
 
@@ -458,7 +461,7 @@ class SourceShape(Source):
             geometry_type = geometry['type']
             coordinates = geometry['coordinates']
 
-        logger.debug('geometry_type: %s' % geometry_type)
+        logger.debug('geometry_type: %s', geometry_type)
 
         if geometry_type == 'Point':
             return transform(old_projection, new_projection, *coordinates)
@@ -514,7 +517,7 @@ class SourceShape(Source):
 
         feature_number = 1
         for feature in self.source:
-            logger.debug('importing feature number: %d' % feature_number)
+            logger.debug('importing feature number: %d', feature_number)
             feature_number += 1
 
             try:
@@ -1,7 +1,9 @@
 from __future__ import absolute_import
 
-from itertools import groupby, imap, izip, tee
+from itertools import groupby, ifilter, imap, islice, izip
 import logging
+from operator import itemgetter
+import re
 import types
 
 from django.conf import settings
@@ -9,18 +11,28 @@ from django.conf import settings
 import jsonpath_rw
 
 from .aggregates import AGGREGATES_NAMES
-from .exceptions import LQLParseError
-from .filters import FILTER_CLASS_MAP, FILTER_NAMES
+from .exceptions import LIBREValueError, LQLParseError
+from .filters import FILTER_BY_NAME, HASHABLE_SCALAR_TYPES
 from .literals import (
-    DOUBLE_DELIMITER, JOIN_TYPE_AND, JOIN_TYPES,
+    DOUBLE_DELIMITER, FILTER_REORDER_INTERVAL, JOIN_TYPE_AND, JOIN_TYPES,
     JOIN_TYPE_OR)
 from .settings import LQL_DELIMITER
-from .utils import attrib_sorter, parse_value, return_attrib
+from .utils import AttribGetter, parse_value
 
 logger = logging.getLogger(__name__)
 
+# example: Count(*), matches the aggregate name and its argument
+AGGREGATE_REGEX = re.compile(r'^(?P<name>%s)\((?P<argument>.*)\)$' % '|'.join(AGGREGATES_NAMES))
+
+
+class Query(object):
+    # Fixed attribute layout, avoids a per instance dictionary
+    __slots__ = (
+        'source', 'json_path', 'aggregates', 'filters', 'groups', 'join_type',
+        'filters_function_map', 'as_dict_list', 'as_nested_list', 'rows_evaluated',
+        'repeated_fields', 'adaptive_order', 'decisive_result'
+    )
 
-class Query():
     def __init__(self, source):
         self.source = source
         self.json_path = None
@@ -30,17 +42,24 @@ class Query():
         self.join_type = JOIN_TYPE_AND
         self.filters_function_map = []
         self.as_dict_list = self.as_nested_list = False
+        self.rows_evaluated = 0
+        self.repeated_fields = False
+        self.adaptive_order = False
+        self.decisive_result = False
 
     def execute(self, parameters):
-        if not parameters:
-            parameters = {}
+        if parameters:
+            self.parse_query(parameters)
+
+        if not (self.filters or self.groups or self.aggregates or self.json_path or self.as_dict_list or self.as_nested_list):
+            # Nothing to filter or process, return the rows up to the limit as is
+            return self.data_iterator()
 
-        self.parse_query(parameters)
         self.get_filter_functions_map()
 
-        logger.debug('join type: %s' % JOIN_TYPES[self.join_type])
+        logger.debug('join type: %s', JOIN_TYPES[self.join_type])
 
-        logger.debug('self.filters_function_map: %s' % self.filters_function_map)
+        logger.debug('self.filters_function_map: %s', self.filters_function_map)
 
         iterator = self.process_transform(
             self.process_json_path(
@@ -56,8 +75,8 @@ class Query():
 
     def parse_query(self, parameters):
         for parameter, value in parameters.items():
-            logger.debug('parameter: %s' % parameter)
-            logger.debug('value: %s' % value)
+            logger.debug('parameter: %s', parameter)
+            logger.debug('value: %s', value)
 
             if parameter.startswith(LQL_DELIMITER):
                 # Single delimiter? It is a predicate
@@ -84,13 +103,11 @@ class Query():
                     except IndexError:
                         raise LQLParseError('Must specify a result name separated by a double delimiter')
 
-                    if any(map(value.startswith, AGGREGATES_NAMES)):  # Is it any of the known aggregate names?
-                        aggregate_name, value = value.split('(', 1)
-                        value = value[:-1]  # remove last parentheses from value
-
+                    match = AGGREGATE_REGEX.match(value)
+                    if match:  # Is it any of the known aggregate names?
                         self.aggregates.append({
                             'name': output_name,
-                            'function': AGGREGATES_NAMES[aggregate_name](value)
+                            'function': AGGREGATES_NAMES[match.group('name')](match.group('argument'))
                         })
                     else:
                         raise LQLParseError('Unknown aggregate: %s' % value)
@@ -148,51 +165,99 @@ class Query():
 
     def get_filter_functions_map(self):
         for filter_entry in self.filters:
-            filters_dictionary = {'field': filter_entry['field'], 'filter_name': filter_entry['filter_name'], 'filter_value': filter_entry['filter_value']}
+            # Build the dotted field accessor once per query instead of splitting the path for every row
+            filters_dictionary = {'field': filter_entry['field'], 'getter': AttribGetter(filter_entry['field']), 'filter_name': filter_entry['filter_name'], 'filter_value': filter_entry['filter_value']}
             try:
-                filter_identifier = FILTER_NAMES[filter_entry['filter_name']]
+                filter_class = FILTER_BY_NAME[filter_entry['filter_name']]
             except KeyError:
                 raise LQLParseError('Unknown filter: %s' % filter_entry['filter_name'])
             else:
-                filters_dictionary['operation'] = FILTER_CLASS_MAP[filter_identifier](filter_entry['field'], filter_entry['filter_value'], filter_entry['negation'])
+                filters_dictionary['operation'] = filter_class(filter_entry['field'], filter_entry['filter_value'], filter_entry['negation'])
+                filters_dictionary['spatial'] = filter_class.spatial
+                # Number of rows this filter was evaluated on and decided on its own
+                filters_dictionary['evaluated'] = 0
+                filters_dictionary['decided'] = 0
                 self.filters_function_map.append(filters_dictionary)
 
-    def data_iterator(self):
-        count = 0
+        fields = [filter_entry['field'] for filter_entry in self.filters_function_map]
+        self.repeated_fields = len(set(fields)) != len(fields)
+
+        # Filter result that decides a row on its own: False for AND joins, True for OR joins
+        self.decisive_result = self.join_type == JOIN_TYPE_OR
+        # A single filter has nothing to be reordered against
+        self.adaptive_order = len(self.filters_function_map) > 1
+
+        # Evaluate the cheap filters first, when they decide the row
+        # the short-circuiting join skips the spatial ones entirely
+        self.filters_function_map.sort(key=itemgetter('spatial'))
+
+    def filter_row(self, item):
+        """
+        Evaluate the filters against a row, stopping at the first filter
+        that decides it: a False result for AND joins, a True one for OR joins
+        """
+        adaptive_order = self.adaptive_order
+        if adaptive_order:
+            self.rows_evaluated += 1
+            if not self.rows_evaluated % FILTER_REORDER_INTERVAL:
+                # Adapt the filter order to the data, the filters that decided the
+                # largest share of the rows they saw go first, spatial filters are
+                # still kept last. A share and not a total, as later filters only
+                # see the rows the earlier ones let through
+                self.filters_function_map.sort(key=lambda entry: (entry['spatial'], -float(entry['decided']) / (entry['evaluated'] or 1)))
+
+        decisive_result = self.decisive_result
+
+        # Values already resolved for this row, so that several filters
+        # on the same field (ie: geometry.area) don't recompute it, only
+        # allocated when a field is actually filtered more than once
+        if self.repeated_fields:
+            values = {}
+        else:
+            values = None
 
-        for item in self.source.base_iterator:
+        for filter_entry in self.filters_function_map:
+            if values is not None and filter_entry['field'] in values:
+                value = values[filter_entry['field']]
+            else:
+                try:
+                    value = filter_entry['getter'](item)
+                except (AttributeError, TypeError, KeyError):
+                    # A dotted attribute is not found
+                    raise LQLParseError('Invalid element: %s' % filter_entry['field'])
 
-            if self.filters_function_map:
-                filter_results = []
-                for filter_entry in self.filters_function_map:
+                if values is not None:
+                    values[filter_entry['field']] = value
 
-                    try:
-                        value = return_attrib(item, filter_entry['field'])
-                    except (AttributeError, TypeError, KeyError):
-                        # A dotted attribute is not found
-                        raise LQLParseError('Invalid element: %s' % filter_entry['field'])
-                    else:
-                        # Evaluate row values against the established filters
-                        # TODO: further optimization: if join == AND and result == False and len(filter_map) > 1 then break
-                        filter_results.append(filter_entry['operation'].evaluate(value))
-
-                if self.join_type == JOIN_TYPE_AND:
-                    if all(filter_results):
-                        count += 1
-                        yield item
-                        if count >= self.source.limit:
-                            break
-                else:
-                    if any(filter_results):
-                        count += 1
-                        yield item
-                        if count >= self.source.limit:
-                            break
-            else:
-                count += 1
-                yield item
-                if count >= self.source.limit:
-                    break
+            # Evaluate row values against the established filters
+            if adaptive_order:
+                filter_entry['evaluated'] += 1
+
+            if bool(filter_entry['operation'].evaluate(value)) == decisive_result:
+                if adaptive_order:
+                    filter_entry['decided'] += 1
+                return decisive_result
+
+        return not decisive_result
+
+    def base_iterator(self, limit=None):
+        queryset = self.source.base_queryset
+        if limit:
+            # Slice the queryset so the database only returns the rows needed
+            queryset = queryset[:limit]
+
+        return (item.row for item in queryset.iterator())
+
+    def data_iterator(self):
+        if self.filters_function_map:
+            iterator = ifilter(self.filter_row, self.base_iterator())
+        else:
+            # Without filters every row is a result, fetch only up to the limit
+            iterator = self.base_iterator(limit=self.source.limit)
+
+        # Let itertools drive the row loop and the limit count instead of
+        # doing the bookkeeping in Python for every row
+        return islice(iterator, self.source.limit)
 
     def process_groups(self, iterator):
         if self.groups:
@@ -201,16 +266,40 @@ class Query():
             return iterator
 
     def _group_generator(self, iterator):
+        # Every group walks the whole data set, read it only once instead of
+        # teeing the iterator, as tee ends up buffering all of it anyway
+        data = list(iterator)
+
         for group in self.groups:
-            iterator, backup = tee(iterator)
-            # Make a backup of the generator
-            sorted_data = attrib_sorter(backup, key=group)
-            group_dictionary = {'name': group, 'values': []}
+            try:
+                if '.' in group:
+                    # Grouping by an element property, store it along the element
+                    getter = AttribGetter(group)
+                    group_data = [dict(item, **{group: getter(item)}) for item in data]
+                else:
+                    group_data = data
 
-            for key, group_data in groupby(sorted_data, lambda x: x[group]):
-                group_dictionary['values'].append({'value': key, 'elements': list(group_data)})
+                values = self._group_values(group_data, itemgetter(group))
+            except (KeyError, LIBREValueError):
+                raise LIBREValueError('Unknown field name or field property: %s' % group)
 
-            yield group_dictionary
+            yield {'name': group, 'values': values}
+
+    def _group_values(self, data, key_getter):
+        keys = [key_getter(item) for item in data]
+
+        if all(isinstance(key, HASHABLE_SCALAR_TYPES) for key in keys):
+            # Bucket the elements by value in a single pass, only the
+            # distinct values need to be sorted afterwards
+            buckets = {}
+            for key, item in izip(keys, data):
+                buckets.setdefault(key, []).append(item)
+
+            return [{'value': key, 'elements': buckets[key]} for key in sorted(buckets)]
+        else:
+            # Values that may compare equal while hashing differently (ie: geometries)
+            # or unhashable ones (ie: lists), fallback to sorting the elements
+            return [{'value': key, 'elements': list(elements)} for key, elements in groupby(sorted(data, key=key_getter), key_getter)]
 
     def process_aggregates(self, iterator):
         if self.aggregates:
@@ -228,11 +317,17 @@ class Query():
                         group_value['aggregates'].append({aggregate['name']: aggregate['function'].execute(group_value['elements'])})
                 yield group
         else:
+            # Update all the aggregates with each element, in a single pass
+            for aggregate in self.aggregates:
+                aggregate['function'].start()
+
+            for element in iterator:
+                for aggregate in self.aggregates:
+                    aggregate['function'].update(element)
+
             result = {}
             for aggregate in self.aggregates:
-                # Make a backup of the generator
-                iterator, backup = tee(iterator)
-                result[aggregate['name']] = aggregate['function'].execute(backup)
+                result[aggregate['name']] = aggregate['function'].finalize()
             yield result
 
     def process_json_path(self, iterator):
@@ -241,7 +336,7 @@ class Query():
                 expression = jsonpath_rw.parse(self.json_path)
 
                 # TODO: test this with the new iterator based pipeline
-                if isinstance(iterator, (types.GeneratorType)):
+                if isinstance(iterator, (types.GeneratorType, islice)):
                     results = [match.value for match in expression.find(list(iterator))]
                 else:
                     results = [match.value for match in expression.find(iterator)]
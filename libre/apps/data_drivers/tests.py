@@ -6,10 +6,16 @@ import os
 from django.conf import settings
 from django.test import TestCase
 
+from shapely import geometry
+
 from origins.models import OriginPath
 
-from .literals import DATA_TYPE_STRING, DATA_TYPE_NUMBER
+from .aggregates import Max, Min
+from .exceptions import LIBREValueError, LQLFilterError, LQLParseError
+from .filters import Disjoint, In, Intersects
+from .literals import DATA_TYPE_STRING, DATA_TYPE_NUMBER, FILTER_REORDER_INTERVAL
 from .models import SourceFixedWidth
+from .query import Query
 from .utils import parse_value, parse_request
 
 TEST_FIXED_WIDTH_FILE = 'prmunnet.txt'
@@ -72,7 +78,48 @@ class QueryTestCase(TestCase):
         result = list(self.fw_source.get_all(parameters={'_aggregate__births': 'Sum(births)'}))
         self.assertEqual(result, [{'births': 585532}])
 
+    def test_aggregate_count_and_sum(self):
+        result = list(self.fw_source.get_all(parameters={'_aggregate__total': 'Count(*)', '_aggregate__births': 'Sum(births)'}))
+        self.assertEqual(result, [{'total': 78, 'births': 585532}])
+
+    def test_aggregate_malformed(self):
+        self.assertRaises(LQLParseError, self.fw_source.get_all, parameters={'_aggregate__total': 'Countx(a)'})
+        self.assertRaises(LQLParseError, self.fw_source.get_all, parameters={'_aggregate__total': 'Count(a'})
+
     # Groupping
+    def test_groupping_unknown_field(self):
+        self.assertRaises(LIBREValueError, lambda: list(self.fw_source.get_all(parameters={'_group_by': 'items'})))
+
+    def test_groupping_unhashable_values(self):
+        query = Query(None)
+        query.groups = ['tags']
+        result = list(query.process_groups(iter([{'tags': [1, 2]}, {'tags': [0]}, {'tags': [1, 2]}])))
+        self.assertEqual(result, [
+            {'name': 'tags', 'values': [
+                {'value': [0], 'elements': [{'tags': [0]}]},
+                {'value': [1, 2], 'elements': [{'tags': [1, 2]}, {'tags': [1, 2]}]}
+            ]}
+        ])
+
+    def test_groupping_equal_values_hashing_differently(self):
+        class Value(object):
+            # Compares by value but hashes by identity, like Shapely geometries
+            def __init__(self, value):
+                self.value = value
+
+            def __eq__(self, other):
+                return self.value == other.value
+
+            def __lt__(self, other):
+                return self.value < other.value
+
+            __hash__ = object.__hash__
+
+        query = Query(None)
+        query.groups = ['geometry']
+        result = list(query.process_groups(iter([{'geometry': Value(0)}, {'geometry': Value(0)}, {'geometry': Value(1)}])))
+        self.assertEqual([(group['value'].value, len(group['elements'])) for group in result[0]['values']], [(0, 2), (1, 1)])
+
     def test_groupping_aggregate_sum_and_json_path(self):
         result = list(self.fw_source.get_all(parameters={'_group_by': 'city', '_aggregate__births': 'Sum(births)', '_json_path': '[*]..(births)'}))
         self.assertEqual(result, [
@@ -152,6 +199,21 @@ class QueryTestCase(TestCase):
             (6925, 2979)
         ])
 
+    # Single element
+    def test_get_one(self):
+        result = list(self.fw_source.get_one(2))
+        self.assertEqual(result, [
+            {
+                'city': 'Aguada', 'percent_change': 11.4,
+                'deaths': 2189, 'births': 5884, 'net_migration': 404, '1999_estimate': 40010,
+                'natural_increase': 3695, '_id': 2, '1990_census': 35911
+            }
+        ])
+
+    def test_get_one_out_of_range(self):
+        result = list(self.fw_source.get_one(1000))
+        self.assertEqual(result, [])
+
     # Filters
     def test_filtering_equal(self):
         result = list(self.fw_source.get_all(parameters={'city': '"Aguada"'}))
@@ -163,6 +225,37 @@ class QueryTestCase(TestCase):
             }
         ])
 
+    def test_filtering_join_or(self):
+        result = list(self.fw_source.get_all(parameters={'_join': 'OR', 'city': '"Aguada"', 'city__endswith': '"abo"', '_json_path': '[*].(city)'}))
+        self.assertEqual(result, ['Aguada', 'Guaynabo', 'Gurabo', 'Maunabo', 'Naguabo'])
+
+    def test_filtering_in_subquery(self):
+        other_source = SourceFixedWidth.objects.create(name='other fixed width source', slug='other-fixed-width-source', origin=self.origin_url, limit=200)
+        other_source.columns.create(name='city', size=18, data_type=DATA_TYPE_STRING, skip_regex=r'(?:Municipio.*|\||-.*|Puerto Rico)')
+        other_source.check_source_data()
+
+        result = list(self.fw_source.get_all(parameters={'city__in': '<other-fixed-width-source&city__endswith="abo"&_json_path=[*].(city)>', '_json_path': '[*].(city)'}))
+        self.assertEqual(result, ['Guaynabo', 'Gurabo', 'Maunabo', 'Naguabo'])
+
+        # Subquery results are materialized, not left as a lazy iterator
+        result = parse_value('<other-fixed-width-source&city__endswith="abo">')
+        self.assertIsInstance(result, list)
+        self.assertEqual(len(result), 4)
+
+    def test_filtering_adaptive_order(self):
+        query = Query(None)
+        query.filters = [
+            {'field': 'a', 'filter_name': 'lt', 'negation': False, 'filter_value': 50},  # Rejects half the rows
+            {'field': 'b', 'filter_name': 'lt', 'negation': False, 'filter_value': 1},  # Rejects almost all rows
+        ]
+        query.get_filter_functions_map()
+        self.assertEqual([entry['field'] for entry in query.filters_function_map], ['a', 'b'])
+
+        for row_id in range(FILTER_REORDER_INTERVAL):
+            query.filter_row({'a': row_id % 100, 'b': (row_id * 7) % 100})
+
+        self.assertEqual([entry['field'] for entry in query.filters_function_map], ['b', 'a'])
+
     def test_filtering_contains(self):
         result = list(self.fw_source.get_all(parameters={'city__contains': '"uad"', '_json_path': '[*].(city)'}))
         self.assertEqual(result, ['Aguada', 'Aguadilla', 'Utuado'])
@@ -178,6 +271,68 @@ class QueryTestCase(TestCase):
         self.assertEqual(result, ['Guaynabo', 'Gurabo', 'Maunabo', 'Naguabo'])
 
 
+class AggregateTestCase(TestCase):
+    def test_max_min_empty(self):
+        self.assertEqual(Max('births').execute([]), None)
+        self.assertEqual(Min('births').execute([]), None)
+
+    def test_max_min_none_property(self):
+        class Element(object):
+            def __init__(self, value):
+                self.value = value
+
+        elements = [{'p': Element(3)}, {'p': Element(None)}, {'p': Element(1)}]
+        self.assertEqual(Max('p.value').execute(elements), 3)
+        self.assertEqual(Min('p.value').execute(elements), None)
+
+
+class InFilterTestCase(TestCase):
+    def test_scalar_values(self):
+        operation = In('city', [u'Aguada', u'Utuado', 5], False)
+        self.assertNotEqual(operation.filter_set, None)
+        self.assertTrue(operation.evaluate(u'Aguada'))
+        self.assertTrue(operation.evaluate(5))
+        self.assertFalse(operation.evaluate(u'Arecibo'))
+
+    def test_geometry_values(self):
+        operation = In('geometry', [geometry.Point(1, 1), geometry.Point(2, 2)], False)
+        self.assertEqual(operation.filter_set, None)
+        self.assertTrue(operation.evaluate(geometry.Point(1, 1)))
+        self.assertFalse(operation.evaluate(geometry.Point(3, 3)))
+
+
+class SpatialFilterTestCase(TestCase):
+    def setUp(self):
+        self.area = geometry.Polygon([(0, 0), (0, 2), (2, 2), (2, 0)])
+        self.inside = geometry.Point(1, 1)
+        self.outside = geometry.Point(5, 5)
+
+    def test_intersects(self):
+        operation = Intersects('geometry', self.area, False)
+        self.assertTrue(operation.evaluate(self.inside))
+        self.assertFalse(operation.evaluate(self.outside))
+
+    def test_intersects_negated(self):
+        operation = Intersects('geometry', self.area, True)
+        self.assertFalse(operation.evaluate(self.inside))
+        self.assertTrue(operation.evaluate(self.outside))
+
+    def test_disjoint(self):
+        operation = Disjoint('geometry', self.area, False)
+        self.assertFalse(operation.evaluate(self.inside))
+        self.assertTrue(operation.evaluate(self.outside))
+
+    def test_disjoint_negated(self):
+        operation = Disjoint('geometry', self.area, True)
+        self.assertTrue(operation.evaluate(self.inside))
+        self.assertFalse(operation.evaluate(self.outside))
+
+    def test_non_geometry_filter_value(self):
+        self.assertRaises(LQLFilterError, Intersects, 'geometry', 5, False)
+        self.assertRaises(LQLFilterError, Disjoint, 'geometry', u'x', False)
+        self.assertRaises(LQLFilterError, Disjoint, 'geometry', u'x', True)
+
+
 class UtilitiesTestCase(TestCase):
     def test_query_parsing(self):
         class Request():
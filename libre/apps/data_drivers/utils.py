@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 
+from collections import Iterator
 from HTMLParser import HTMLParser
 import logging
 from operator import itemgetter
@@ -62,7 +63,7 @@ def parse_value(string):
 
     string = html_parser.unescape(string).strip()
 
-    logger.debug('parsing: %s' % string)
+    logger.debug('parsing: %s', string)
     if string[0] == '"' and string[-1] == '"':
         # Strip quotes
         return unicode(string[1:-1])
@@ -119,10 +120,10 @@ def parse_value(string):
         try:
             new_source = Source.objects.get_subclass(slug=source_slug)
         except Source.DoesNotExist:
-            logger.error('no source named: %s' % source_slug)
+            logger.error('no source named: %s', source_slug)
             raise LIBREValueError('no source named: %s' % source_slug)
         else:
-            logger.debug('got new source named: %s' % source_slug)
+            logger.debug('got new source named: %s', source_slug)
             # Rebuild the parameters for this enclosed value, omitting the source slug
             new_string = u'&'.join(parts[1:])
 
@@ -135,19 +136,25 @@ def parse_value(string):
                 else:
                     parameters[key] = value
 
-            return new_source.get_all(parameters=parameters)
+            result = new_source.get_all(parameters=parameters)
+            if isinstance(result, Iterator):
+                # Query results are lazy, materialize them once or the filter
+                # using them would exhaust them while evaluating the first row
+                result = list(result)
+
+            return result
     else:
         logger.debug('Is a number')
         try:
             return convert_to_number(string)
         except ValueError:
-            logger.error('Invalid value or unknown source: %s' % string)
+            logger.error('Invalid value or unknown source: %s', string)
             raise LIBREValueError('Invalid value or unknown source: %s' % string)
 
 
 def parse_as_geometry(string):
     geometry_name, value = string.split('(', 1)
-    logger.debug('geometry name: %s' % geometry_name)
+    logger.debug('geometry name: %s', geometry_name)
 
     # Get the geometry class from the 'shapely.geometry' module
     geometry_class = getattr(geometry, geometry_name, geometry.shape)
@@ -245,14 +252,30 @@ def return_attrib(obj, attrib):
     return reduce(get_value, attrib.split(u'.'), obj)
 
 
-def attrib_sorter(data, key):
-    try:
-        if '.' in key:
-            # Sort by an element property
-            logger.debug('has point')
-            variable, properties = key.split('.', 1)
-            logger.debug('variable, properties: %s, %s' % (variable, properties))
-            data = (dict(item, **{key: return_attrib(itemgetter(variable)(item), properties)}) for item in data)
-        return sorted(data, key=itemgetter(key))
-    except KeyError:
-        raise LIBREValueError('Unknown field name or field property: %s' % key)
+class AttribGetter(object):
+    """
+    Callable fetching a dotted attribute from an object, the attribute path
+    is split once and the leading plain dictionaries are walked with
+    itemgetters, the first time the path stops being a dictionary
+    (ie: geometry.area) the remaining parts switch to get_value for good
+    """
+    def __init__(self, attrib):
+        self.parts = attrib.split(u'.')
+        self.item_getters = [itemgetter(part) for part in self.parts]
+        self.remaining_parts = []
+
+    def __call__(self, obj):
+        value = obj
+        for index, part_getter in enumerate(self.item_getters):
+            try:
+                value = part_getter(value)
+            except (KeyError, TypeError):
+                # Resolve this and the following parts with get_value from now on
+                self.item_getters = self.item_getters[:index]
+                self.remaining_parts = self.parts[index:]
+                break
+
+        if self.remaining_parts:
+            value = reduce(get_value, self.remaining_parts, value)
+
+        return value
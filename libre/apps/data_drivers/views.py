@@ -130,7 +130,7 @@ class SourceGetAll(LIBREView):
         source = self.get_object()
         self.get_renderer_extra_variables(request)
         result = source.get_all(parameters=parse_request(request))
-        logger.debug('Total view elapsed time: %s' % (datetime.datetime.now() - initial_datetime))
+        logger.debug('Total view elapsed time: %s', datetime.datetime.now() - initial_datetime)
 
         return CustomResponse(result)
 
@@ -142,7 +142,7 @@ class SourceGetOne(LIBREView):
         source = self.get_object()
         self.get_renderer_extra_variables(request)
         result = source.get_one(int(kwargs['id']), parameters=parse_request(request))
-        logger.debug('Total view elapsed time: %s' % (datetime.datetime.now() - initial_datetime))
+        logger.debug('Total view elapsed time: %s', datetime.datetime.now() - initial_datetime)
 
         return CustomResponse(result)
 